@@ -1,10 +1,14 @@
+import itertools
 from parts import Part, Engine, Scanner, Storage
 from config import FunctionID, ResourceType
 from interpreter import Interpreter
 
 
 class Automaton:
+    _ids = itertools.count()
+
     def __init__(self, program_code, parts_genome, world, position):
+        self.id = next(Automaton._ids)  # Unikalny identyfikator (obserwatorzy, filogeneza)
         self.world = world
         self.position = position
         self.alive = True
@@ -20,6 +24,7 @@ class Automaton:
         self._assemble_robot(parts_genome)
 
         self.energy = 100.0  # Startowa energia
+        self.last_action = None  # (func_id, args) z ostatniego kroku
 
     def _assemble_robot(self, genome):
         """Tworzy instancje części na podstawie genomu."""
@@ -58,6 +63,7 @@ class Automaton:
 
         # 1. Wybór akcji przez program
         func_id, args = self.interpreter.run_step(self)
+        self.last_action = (func_id, args)
 
         # 2. Wykonanie akcji
         if func_id in self.part_map:
@@ -78,6 +84,11 @@ class Automaton:
                         adder(child)
                         break
 
+                # zapis filogenezy – jeśli świat ma podpięty PhylogenyRecorder
+                phylogeny = getattr(self.world, "phylogeny", None)
+                if phylogeny is not None:
+                    phylogeny.record_birth(child, self, getattr(self.world, "tick", 0))
+
         if self.energy <= 0:
             self.die()
 
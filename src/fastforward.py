@@ -0,0 +1,287 @@
+import copy
+import numpy as np
+from parts import PowerGenerator
+
+# Ile cykli naraz rozwijamy przy liczeniu energii (ogranicza zużycie pamięci)
+CHUNK_CYCLES = 4096
+
+
+class _Cycle:
+    '''
+    Zamknięty cykl automatu.
+
+    Attributes:
+        phases : list
+            Kolejne kroki cyklu - (migawka stanu przed krokiem, operacje na energii w kroku).
+        start_tick : int
+            Krok silnika, od którego automat śpi (odpowiada fazie 0).
+        start_energy : float
+            Energia automatu w start_tick.
+        wake_tick : int | None
+            Krok, w którym trzeba go obudzić (zbliża się śmierć); None - nigdy.
+    '''
+    def __init__(self, phases, start_tick, start_energy):
+        self.phases = phases
+        self.start_tick = start_tick
+        self.start_energy = start_energy
+        self.wake_tick = None
+
+        ops = [op for _snap, tick_ops in phases for op in tick_ops]
+        self.ops = np.array(ops, dtype=float)
+        # Indeks ostatniej operacji każdego kroku w self.ops
+        self.tick_ends = np.cumsum([len(tick_ops) for _snap, tick_ops in phases]) - 1
+
+    @property
+    def period(self):
+        return len(self.phases)
+
+    def energy_trace(self, energy, ticks):
+        """
+        Energia po każdym z kolejnych ticks kroków, zaczynając od fazy 0.
+        Sumowanie jest sekwencyjne (np.add.accumulate), więc wynik jest bit w bit
+        taki sam jak przy krokowaniu update() po kolei.
+        """
+        n_cycles = -(-ticks // self.period)
+        ops = np.concatenate(([energy], np.tile(self.ops, n_cycles)))
+        ends = (self.tick_ends + len(self.ops) * np.arange(n_cycles)[:, None]).ravel()[:ticks]
+        return np.add.accumulate(ops)[ends + 1]
+
+
+class SteadyStateEngine:
+    '''
+    Pętla symulacji, która przewija automaty kręcące się w zamkniętych cyklach.
+
+    Automat zasypia, gdy jego stan (interpreter, pamięć, pozycja, magazyny) wraca do
+    wcześniejszego, a wszystkie kroki po drodze nie ruszały świata - wywoływały
+    nieistniejącą funkcję albo IDLE generatora. Energia nie wpływa na program, więc
+    przyszłość takiego automatu to powtarzanie cyklu aż do śmierci. Śpiący automat
+    jest doliczany dopiero przy wybudzeniu lub sync() - kto czyta jego energię
+    (np. ObserverServer.publish), powinien najpierw wywołać sync_all().
+
+    Budzi się sam przed przewidzianą śmiercią oraz gdy w promieniu wake_radius zmieni
+    się pole mapy (world.mark_changed), przejdzie lub urodzi się inny automat.
+    Inne zdarzenia można zgłaszać przez wake() / wake_near().
+    '''
+    def __init__(self, world, max_period=16, wake_radius=1):
+        self.world = world
+        self.max_period = max_period
+        self.wake_radius = wake_radius
+        self.tick = 0
+        self._history = {}    # robot.id -> [(sygnatura, migawka, operacje)]
+        self._idle_state = {}  # robot.id -> (sygnatura, migawka) stanu po ostatnim bezczynnym kroku
+        self._sleeping = {}   # robot.id -> (robot, _Cycle)
+        self._cells = {}      # pozycja -> {robot.id} śpiących tam automatów
+        self._known = set()   # id automatów widzianych w poprzednich krokach
+        self._woken = []      # automaty obudzone w trakcie bieżącego kroku
+
+        listeners = getattr(world, "tile_listeners", None)
+        if listeners is not None:
+            listeners.append(lambda i, j: self.wake_near((i, j), self.wake_radius))
+
+    def step(self, automata):
+        """Jeden krok symulacji dla wszystkich automatów."""
+        self.world.tick = self.tick
+        stepped = set()
+        for robot in automata:
+            if not robot.alive:
+                self._forget(robot)
+                continue
+            if robot.id not in self._known:
+                self._known.add(robot.id)
+                self.wake_near(robot.position, self.wake_radius)
+            if robot.id in self._sleeping:
+                cycle = self._sleeping[robot.id][1]
+                if cycle.wake_tick is None or self.tick < cycle.wake_tick:
+                    continue
+                self.wake(robot)
+            if self._step_robot(robot):
+                stepped.add(robot.id)
+
+        # Automaty obudzone po tym, jak pętla je minęła (albo zaraz po zaśnięciu), też
+        # muszą wykonać ten krok
+        while self._woken:
+            robot = self._woken.pop()
+            if robot.alive and robot.id not in stepped and robot.id not in self._sleeping:
+                if self._step_robot(robot):
+                    stepped.add(robot.id)
+        self.tick += 1
+
+    def is_sleeping(self, robot):
+        return robot.id in self._sleeping
+
+    def wake(self, robot):
+        """Dolicza stan śpiącego automatu do bieżącego kroku i wraca do zwykłego krokowania."""
+        if robot.id not in self._sleeping:
+            return
+        self.sync(robot)
+        if robot.id in self._sleeping:  # sync() mógł go już uśmiercić
+            self._unsleep(robot)
+        self._history.pop(robot.id, None)
+        self._woken.append(robot)
+
+    def wake_all(self):
+        for robot, _cycle in list(self._sleeping.values()):
+            self.wake(robot)
+
+    def wake_near(self, position, radius):
+        """Budzi automaty w promieniu radius (metryka Czebyszewa) od position."""
+        row, col = int(position[0]), int(position[1])
+        for i in range(row - radius, row + radius + 1):
+            for j in range(col - radius, col + radius + 1):
+                for robot_id in list(self._cells.get((i, j), ())):
+                    self.wake(self._sleeping[robot_id][0])
+
+    def sync(self, robot):
+        """
+        Ustawia stan śpiącego automatu (energia, interpreter, pamięć) na bieżący krok.
+        Jeśli w międzyczasie energia spadła do zera - automat umiera.
+        """
+        if robot.id not in self._sleeping:
+            return
+        cycle = self._sleeping[robot.id][1]
+        elapsed = self.tick - cycle.start_tick
+        if not elapsed:
+            return
+
+        energy, done = cycle.start_energy, 0
+        while done < elapsed:
+            ticks = min(elapsed - done, CHUNK_CYCLES * cycle.period)
+            trace = cycle.energy_trace(energy, ticks)
+            dead = np.flatnonzero(trace <= 0)
+            if dead.size:
+                done += dead[0] + 1
+                energy = trace[dead[0]]
+                break
+            done += ticks
+            energy = trace[-1]
+
+        phase = done % cycle.period
+        self._restore(robot, cycle.phases[phase][0])
+        robot.energy = float(energy)
+        if energy <= 0:
+            self._unsleep(robot)
+            robot.die()
+            return
+
+        # Przesunięcie cyklu tak, by faza 0 odpowiadała bieżącemu krokowi
+        rotated = _Cycle(cycle.phases[phase:] + cycle.phases[:phase], self.tick, robot.energy)
+        rotated.wake_tick = cycle.wake_tick
+        self._sleeping[robot.id] = (robot, rotated)
+
+    def sync_all(self):
+        for robot, _cycle in list(self._sleeping.values()):
+            self.sync(robot)
+
+    # --------------------------
+
+    def _forget(self, robot):
+        self._history.pop(robot.id, None)
+        self._idle_state.pop(robot.id, None)
+        self._known.discard(robot.id)
+        if robot.id in self._sleeping:
+            self._unsleep(robot)
+
+    def _unsleep(self, robot):
+        self._sleeping.pop(robot.id)
+        cell = self._cells[tuple(robot.position)]
+        cell.discard(robot.id)
+        if not cell:
+            del self._cells[tuple(robot.position)]
+
+    def _step_robot(self, robot):
+        """
+        Krok pojedynczego automatu - zasypia albo wykonuje update().
+        Zwraca True, jeśli update() został wykonany.
+
+        Sygnaturę i migawkę stanu liczymy tylko po bezczynnych krokach - tylko z nich
+        składa się cykl. Automaty zajęte czymś innym nie płacą za wykrywanie cykli.
+        """
+        before = self._idle_state.pop(robot.id, None)
+        if before is not None and before[0] != self._signature(robot):
+            before = None  # stan zmieniony z zewnątrz między krokami
+        history = self._history.get(robot.id, [])
+        if before is None:
+            history.clear()
+        else:
+            for idx, (past, _snap, _ops) in enumerate(history):
+                if past == before[0] and self._sleep(robot, history[idx:]):
+                    return False
+
+        energy = robot.energy
+        position = tuple(robot.position)
+        robot.update()
+        if tuple(robot.position) != position:
+            self.wake_near(robot.position, self.wake_radius)
+
+        ops = self._idle_ops(robot, energy)
+        if ops is None:
+            self._history.pop(robot.id, None)
+            return True
+        if before is not None:
+            history.append((before[0], before[1], ops))
+            del history[:-self.max_period]
+            self._history[robot.id] = history
+        self._idle_state[robot.id] = (self._signature(robot), self._snapshot(robot))
+        return True
+
+    def _idle_ops(self, robot, energy):
+        """
+        Operacje na energii wykonane w ostatnim update(), o ile krok nie ruszał świata.
+        Zwraca None dla kroków, których nie da się przewinąć.
+        """
+        func_id, _args = robot.last_action
+        part = robot.part_map.get(func_id)
+        if part is None:
+            ops = []
+        elif isinstance(part, PowerGenerator):
+            ops = [part.energy_output]
+        else:
+            return None
+        if not robot.alive or robot.can_reproduce():
+            return None
+        ops.append(-sum(p.passive_energy_drain for p in robot.parts))
+
+        # Kontrola - odtworzenie kroku musi dać dokładnie tę samą energię
+        for op in ops:
+            energy += op
+        return ops if energy == robot.energy else None
+
+    def _sleep(self, robot, entries):
+        cycle = _Cycle([(snap, ops) for _sig, snap, ops in entries], self.tick, robot.energy)
+
+        trace = cycle.energy_trace(robot.energy, cycle.period)
+        lowest, delta = trace.min(), trace[-1] - robot.energy
+        if lowest <= abs(robot.energy) * 1e-9:
+            return False
+        if delta < 0:
+            # Ile pełnych cykli na pewno przeżyje - z zapasem na błędy zaokrągleń
+            safe_cycles = int(lowest * (1 - 1e-9) / -delta) - 2
+            if safe_cycles < 1:
+                return False
+            cycle.wake_tick = self.tick + safe_cycles * cycle.period
+
+        self._sleeping[robot.id] = (robot, cycle)
+        self._cells.setdefault(tuple(robot.position), set()).add(robot.id)
+        self._history.pop(robot.id, None)
+        return True
+
+    @staticmethod
+    def _signature(robot):
+        interpreter = {k: v for k, v in vars(robot.interpreter).items() if k != "program"}
+        storages = tuple(
+            tuple(sorted((res.value, amt) for res, amt in storage.contents.items()))
+            for storage in robot.get_storage_parts()
+        )
+        return repr(interpreter), tuple(robot.memory), tuple(robot.position), storages
+
+    @staticmethod
+    def _snapshot(robot):
+        interpreter = {k: copy.deepcopy(v) for k, v in vars(robot.interpreter).items() if k != "program"}
+        return interpreter, list(robot.memory)
+
+    @staticmethod
+    def _restore(robot, snapshot):
+        interpreter, memory = snapshot
+        for k, v in interpreter.items():
+            setattr(robot.interpreter, k, copy.deepcopy(v))
+        robot.memory = list(memory)
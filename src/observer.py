@@ -0,0 +1,267 @@
+import asyncio
+import os
+import struct
+import threading
+from tile import WaterTile, RESOURCES
+
+# --------------------------
+# Format ramek (little endian):
+#   nagłówek: MAGIC, typ ramki, tick, długość treści
+#   treść:    liczniki, potem sekcje [liczba, wpisy...]: pola, przesunięte, urodzone, martwe
+# Klatka kluczowa ma ten sam układ - wszystkie pola i wszystkie żywe automaty jako "urodzone".
+
+MAGIC = b"VN"
+FRAME_KEY = 1
+FRAME_DELTA = 2
+
+HEADER = struct.Struct("<2sBQI")
+COUNTERS = struct.Struct("<IQQd")  # żywe, urodzone (łącznie), martwe (łącznie), suma energii
+COUNT = struct.Struct("<I")
+TILE = struct.Struct("<HHBBff")    # wiersz, kolumna, woda, surowiec, ilość, głębokość
+ROBOT = struct.Struct("<QHH")      # id, wiersz, kolumna
+DEAD = struct.Struct("<Q")
+
+# Kod surowca w ramce: 0 - brak, potem kolejno wg RESOURCES
+RESOURCE_CODES = {r: i + 1 for i, r in enumerate(RESOURCES)}
+
+# Klient wysyła ten bajt, żeby dostać klatkę kluczową
+REQUEST_KEYFRAME = b"K"
+
+
+def encode_tile(i, j, tile):
+    """Koduje stan pojedynczego pola do wpisu TILE."""
+    water = isinstance(tile, WaterTile)
+    resource, amount = next(iter(tile.materials.items()), (None, 0.0))
+    return TILE.pack(i, j, water, RESOURCE_CODES.get(resource, 0), amount,
+                     tile.depth if water else 0.0)
+
+
+def _section(entries):
+    return COUNT.pack(len(entries)) + b"".join(entries)
+
+
+class _Subscriber:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.needs_keyframe = True
+        self.dropped = 0
+        self.pump = None
+
+
+class ObserverServer:
+    '''
+    Serwer obserwatorów - po każdym kroku rozsyła binarne delty świata i populacji.
+
+    Działa na własnej pętli asyncio w osobnym wątku, więc publish() nigdy nie czeka
+    na widzów. Wolni klienci mają ograniczoną kolejkę ramek: gdy się zapełni, ramki są
+    odrzucane, a klient dostaje następnie klatkę kluczową.
+
+    Attributes:
+        address : tuple | str
+            Adres nasłuchu (host, port) albo ścieżka gniazda Unix - dostępny po start().
+    '''
+    def __init__(self, world, host="127.0.0.1", port=0, path=None, queue_size=32):
+        self.world = world
+        self.host = host
+        self.port = port
+        self.path = path
+        self.queue_size = queue_size
+        self.address = None
+
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._subscribers = set()
+        self._handlers = set()
+
+        # Ostatnia nieodebrana migawka z symulacji - najwyżej jedna czeka na pętlę
+        self._pending_lock = threading.Lock()
+        self._pending = None
+        self._published = None  # id automatów z poprzedniego publish() (wątek symulacji)
+
+        # Lustrzany stan - żyje wyłącznie w wątku pętli
+        self._tick = None
+        self._tiles = {}
+        self._robots = {}
+        self._energy = 0.0
+        self._born_total = 0
+        self._dead_total = 0
+
+    def start(self):
+        """Uruchamia pętlę w tle i czeka, aż serwer zacznie nasłuchiwać."""
+        for i in range(self.world.height):
+            for j in range(self.world.width):
+                self._tiles[i, j] = encode_tile(i, j, self.world.map[i, j])
+        self.world.pop_changed_tiles()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._listen(), self._loop).result()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def publish(self, tick, automata, born=None, dead=None):
+        """
+        Wywoływane przez symulację po każdym kroku. Robi tylko lekką migawkę stanu
+        i przekazuje ją do pętli obserwatora - nie blokuje.
+
+        Jeśli pętla nie zdążyła odebrać poprzedniej migawki, nowa jest z nią scalana
+        (pola się sumują, automaty są zastępowane), więc kolejne kroki zlewają się
+        w jedną deltę zamiast kolejkować się bez końca.
+
+        Liczniki narodzin i śmierci wynikają z różnicy względem poprzedniego publish();
+        automaty obecne przy pierwszym wywołaniu są stanem początkowym. Symulacja może
+        podać born / dead sama, jeśli w jednym kroku automat rodzi się i umiera.
+
+        Energia jest czytana wprost z automatów - przy SteadyStateEngine trzeba
+        najpierw wywołać engine.sync_all(), inaczej śpiące automaty mają starą wartość.
+        """
+        if self._loop is None:
+            return
+        tiles = {(i, j): encode_tile(i, j, self.world.map[i, j])
+                 for i, j in self.world.pop_changed_tiles()}
+        robots = [(a.id, a.position, a.energy) for a in automata if a.alive]
+
+        alive = {rid for rid, _pos, _energy in robots}
+        previous = alive if self._published is None else self._published
+        born = len(alive - previous) if born is None else born
+        dead = len(previous - alive) if dead is None else dead
+        self._published = alive
+
+        with self._pending_lock:
+            schedule = self._pending is None
+            if schedule:
+                self._pending = (tick, tiles, robots, born, dead)
+            else:
+                _tick, pending_tiles, _robots, pending_born, pending_dead = self._pending
+                pending_tiles.update(tiles)
+                self._pending = (tick, pending_tiles, robots, pending_born + born, pending_dead + dead)
+        if schedule:
+            self._loop.call_soon_threadsafe(self._drain)
+
+    # --------------------------
+    # Wątek pętli
+
+    async def _listen(self):
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+            self.address = self.path
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def _shutdown(self):
+        # Zerwanie połączeń daje obsłudze klientów EOF - kończą się same, bez anulowania.
+        # abort() zamiast close(), bo close() czeka na wysłanie bufora zablokowanemu widzowi.
+        self._server.close()
+        for sub in list(self._subscribers):
+            sub.writer.transport.abort()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _drain(self):
+        with self._pending_lock:
+            tick, tiles, robots, born, dead = self._pending
+            self._pending = None
+        self._ingest(tick, list(tiles.values()), robots, born, dead)
+
+    def _ingest(self, tick, tiles, robots, born_count=0, dead_count=0):
+        """Aktualizuje lustrzany stan i rozsyła deltę do subskrybentów."""
+        self._tick = tick
+        for entry in tiles:
+            i, j = TILE.unpack_from(entry)[:2]
+            self._tiles[i, j] = entry
+
+        current = {rid: (int(pos[0]), int(pos[1])) for rid, pos, _energy in robots}
+        moved = [ROBOT.pack(rid, *pos) for rid, pos in current.items()
+                 if rid in self._robots and self._robots[rid] != pos]
+        born = [ROBOT.pack(rid, *pos) for rid, pos in current.items()
+                if rid not in self._robots]
+        dead = [DEAD.pack(rid) for rid in self._robots if rid not in current]
+
+        self._robots = current
+        self._energy = sum(energy for _rid, _pos, energy in robots)
+        self._born_total += born_count
+        self._dead_total += dead_count
+
+        if not self._subscribers:
+            return
+        delta = self._frame(FRAME_DELTA, tiles, moved, born, dead)
+        keyframe = None
+        for sub in list(self._subscribers):
+            if sub.needs_keyframe:
+                keyframe = keyframe or self._keyframe()
+                self._offer(sub, keyframe, key=True)
+            else:
+                self._offer(sub, delta)
+
+    def _offer(self, sub, frame, key=False):
+        """Wrzuca ramkę do kolejki klienta; przy przepełnieniu odrzuca zaległe delty."""
+        try:
+            sub.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+                sub.dropped += 1
+            sub.needs_keyframe = True
+            return
+        if key:
+            sub.needs_keyframe = False
+
+    def _frame(self, frame_type, tiles, moved, born, dead):
+        payload = b"".join((
+            COUNTERS.pack(len(self._robots), self._born_total, self._dead_total, self._energy),
+            _section(tiles), _section(moved), _section(born), _section(dead),
+        ))
+        return HEADER.pack(MAGIC, frame_type, self._tick, len(payload)) + payload
+
+    def _keyframe(self):
+        born = [ROBOT.pack(rid, *pos) for rid, pos in self._robots.items()]
+        return self._frame(FRAME_KEY, list(self._tiles.values()), [], born, [])
+
+    async def _handle(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        sub = _Subscriber(writer, self.queue_size)
+        self._subscribers.add(sub)
+        if self._tick is not None:
+            self._offer(sub, self._keyframe(), key=True)
+        sub.pump = asyncio.create_task(self._pump(sub))
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                if REQUEST_KEYFRAME in data:
+                    sub.needs_keyframe = True
+        except ConnectionError:
+            pass
+        finally:
+            self._handlers.discard(handler)
+            self._subscribers.discard(sub)
+            sub.pump.cancel()
+            writer.close()
+
+    async def _pump(self, sub):
+        try:
+            while True:
+                frame = await sub.queue.get()
+                sub.writer.write(frame)
+                await sub.writer.drain()
+        except ConnectionError:
+            sub.writer.close()
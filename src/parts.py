@@ -35,16 +35,19 @@ class Engine(Part):
     def execute_action(self, robot, args: list[float]):
         """
         f_1(dir, dist).
-        Porusza robotem. Koszt zależy od masy całkowitej robota.
+        Porusza robotem. Koszt zależy od masy całkowitej robota i terenu na drodze.
         """
         direction = int(args[0])
         distance = min(args[1], self.scale * 10)  # Max dystans zależy od skali
 
-        # Obliczenie kosztu energii (Masa * Dystans * Współczynnik)
-        energy_req = robot.get_total_mass() * distance * 0.05
+        # Droga kończy się przed przeszkodą, a woda kosztuje więcej niż ląd
+        target, path_cost = robot.world.plan_move(robot, direction, distance)
+
+        # Obliczenie kosztu energii (Masa * Koszt drogi * Współczynnik)
+        energy_req = robot.get_total_mass() * path_cost * 0.05
 
         if robot.consume_energy(energy_req):
-            robot.world.move_robot(robot, direction, distance)
+            robot.position = target
         else:
             # Brak energii - ruch nieudany, powinno wyczerpać energię do zera i się zatrzymać
             pass
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import numpy as np
+
+# Jeden wiersz = jedno narodziny. Identyfikatory dzieci muszą rosnąć (Automaton.id),
+# dzięki czemu każdy blok jest posortowany i można w nim szukać binarnie.
+BIRTH_DTYPE = np.dtype([
+    ("child", "<i8"),
+    ("parent", "<i8"),
+    ("tick", "<i8"),
+    ("genotype", "<i4"),
+])
+# Indeks bloku posortowany po rodzicu - do szukania dzieci
+PARENT_INDEX_DTYPE = np.dtype([
+    ("parent", "<i8"),
+    ("child", "<i8"),
+])
+NO_PARENT = -1
+UNKNOWN = -1  # tick / genotype automatu, którego narodzin nie zapisano
+
+
+def serialize_program(node):
+    """
+    Kanoniczny zapis drzewa programu (węzły AST, listy, stałe) - dwa programy o tej
+    samej treści dają ten sam napis, niezależnie od tego, czy to ten sam obiekt.
+    """
+    if isinstance(node, (list, tuple)):
+        return "[" + ",".join(serialize_program(n) for n in node) + "]"
+    if isinstance(node, dict):
+        return "{" + ",".join(f"{k!r}:{serialize_program(v)}" for k, v in sorted(node.items())) + "}"
+    if hasattr(node, "__dict__"):
+        return type(node).__name__ + serialize_program(vars(node))
+    return repr(node)
+
+
+class PhylogenyRecorder:
+    '''
+    Zapis filogenezy - dopisuje (child_id, parent_id, tick, genotype_id) dla każdych narodzin.
+
+    Wiersze trafiają do prealokowanych bloków typowanych tablic. Każdy pełny blok dostaje
+    indeks posortowany po rodzicu. Pełne bloki i ich indeksy mogą być zrzucane do plików
+    .npy i dalej czytane przez np.memmap, więc w pamięci siedzi tylko bieżący blok.
+
+    Attributes:
+        block_size : int
+            Liczba wierszy w jednym bloku.
+        spill_dir : str | None
+            Katalog na zrzucone bloki; None - wszystkie bloki zostają w pamięci.
+    '''
+    def __init__(self, block_size=1 << 20, spill_dir=None):
+        self.block_size = block_size
+        self.spill_dir = spill_dir
+        self._blocks = []        # Pełne bloki (np.ndarray albo memmap)
+        self._indexes = []       # Indeksy PARENT_INDEX_DTYPE pełnych bloków
+        self._files = []         # Pliki zrzuconych bloków i indeksów
+        self._current = np.empty(block_size, dtype=BIRTH_DTYPE)
+        self._fill = 0
+        self._last_child = NO_PARENT
+        self._spilled = 0
+
+        self._genotypes = {}     # Klucz genotypu (budowa, skrót programu) -> genotype_id
+
+    def __len__(self):
+        return len(self._blocks) * self.block_size + self._fill
+
+    def genotype_id(self, parts_genome, program):
+        """Zwraca numer genotypu (budowa + program), nadając nowy przy pierwszym wystąpieniu."""
+        digest = hashlib.blake2b(serialize_program(program).encode(), digest_size=16).digest()
+        key = (tuple((cls.__name__, float(scale)) for cls, scale in parts_genome), digest)
+        return self._genotypes.setdefault(key, len(self._genotypes))
+
+    def record_birth(self, child, parent, tick):
+        """Zapisuje narodziny automatu child; parent=None dla automatów założycielskich."""
+        self.record(
+            child.id,
+            NO_PARENT if parent is None else parent.id,
+            tick,
+            self.genotype_id(child.parts_genome, child.interpreter.program),
+        )
+
+    def record(self, child_id, parent_id, tick, genotype_id):
+        if child_id <= self._last_child:
+            raise ValueError(f"child_id {child_id} must be greater than {self._last_child}")
+        self._current[self._fill] = (child_id, parent_id, tick, genotype_id)
+        self._fill += 1
+        self._last_child = child_id
+        if self._fill == self.block_size:
+            self._seal_block(self._current)
+            self._current = np.empty(self.block_size, dtype=BIRTH_DTYPE)
+            self._fill = 0
+
+    @staticmethod
+    def _parent_index(block):
+        order = np.argsort(block["parent"], kind="stable")
+        index = np.empty(len(block), dtype=PARENT_INDEX_DTYPE)
+        index["parent"] = block["parent"][order]
+        index["child"] = block["child"][order]
+        return index
+
+    def _seal_block(self, block):
+        index = self._parent_index(block)
+        if self.spill_dir is None:
+            self._blocks.append(block)
+            self._indexes.append(index)
+            return
+        name = os.path.join(self.spill_dir, f"births_{self._spilled:08d}")
+        self._spilled += 1
+        for path, data, target in ((name + ".npy", block, self._blocks),
+                                   (name + "_by_parent.npy", index, self._indexes)):
+            np.save(path, data)
+            self._files.append(path)
+            target.append(np.load(path, mmap_mode="r"))
+
+    def _views(self):
+        views = list(self._blocks)
+        if self._fill:
+            views.append(self._current[:self._fill])
+        return views
+
+    def _index_views(self):
+        indexes = list(self._indexes)
+        if self._fill:
+            indexes.append(self._parent_index(self._current[:self._fill]))
+        return indexes
+
+    # --------------------------
+    # Zapytania
+
+    def _rows(self, ids):
+        """Zwraca (wiersze, maska znalezionych) dla tablicy identyfikatorów."""
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.zeros(ids.shape, dtype=BIRTH_DTYPE)
+        rows["parent"] = NO_PARENT
+        found = np.zeros(ids.shape, dtype=bool)
+
+        views = self._views()
+        if not views or not ids.size:
+            return rows, found
+        starts = np.array([v["child"][0] for v in views])
+        block = np.searchsorted(starts, ids, side="right") - 1
+        for b in np.unique(block[block >= 0]):
+            sel = np.flatnonzero(block == b)
+            col = views[b]["child"]
+            pos = np.minimum(np.searchsorted(col, ids[sel]), len(col) - 1)
+            hit = col[pos] == ids[sel]
+            rows[sel[hit]] = views[b][pos[hit]]
+            found[sel[hit]] = True
+        return rows, found
+
+    def parents(self, ids):
+        """Rodzice podanych automatów (NO_PARENT dla założycieli i nieznanych)."""
+        return self._rows(ids)[0]["parent"]
+
+    def ancestors(self, node_id):
+        """Łańcuch przodków od rodzica do założyciela."""
+        chain = []
+        parent = self.parents([node_id])[0]
+        while parent != NO_PARENT:
+            chain.append(parent)
+            parent = self.parents([parent])[0]
+        return np.array(chain, dtype=np.int64)
+
+    def clade_size(self, node_id):
+        """Liczba zapisanych potomków node_id (razem z nim samym)."""
+        views, indexes = self._views(), self._index_views()
+        size = 0
+        frontier = np.array([node_id], dtype=np.int64)
+        while frontier.size:
+            size += frontier.size
+            lowest = frontier.min()
+            children = [self._children(index, frontier)
+                        for view, index in zip(views, indexes) if view["child"][-1] > lowest]
+            frontier = np.concatenate(children) if children else frontier[:0]
+        return size
+
+    @staticmethod
+    def _children(index, parents):
+        """Dzieci podanych rodziców w jednym bloku - wyszukiwanie binarne w indeksie."""
+        lo = np.searchsorted(index["parent"], parents, side="left")
+        hi = np.searchsorted(index["parent"], parents, side="right")
+        counts = hi - lo
+        total = counts.sum()
+        if not total:
+            return parents[:0]
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        return index["child"][starts + np.arange(total)]
+
+    def mrca(self, living_ids):
+        """
+        Najbliższy wspólny przodek podanych automatów (None, jeśli nie mają wspólnego).
+        Przodek ma zawsze mniejsze id od potomka, więc podnosimy wszystko ponad minimum.
+        """
+        nodes = np.unique(np.asarray(living_ids, dtype=np.int64))
+        if not nodes.size:
+            return None
+        while nodes.size > 1:
+            lowest = nodes[0]
+            lifted = np.where(nodes > lowest, self.parents(nodes), nodes)
+            if (lifted == NO_PARENT).any():
+                return None
+            nodes = np.unique(lifted)
+        return int(nodes[0])
+
+    # --------------------------
+    # Przycinanie
+
+    def prune(self, living_ids):
+        """
+        Usuwa wygasłe linie. Zostają tylko żywe automaty i punkty rozgałęzień ich
+        drzewa (najbliżsi wspólni przodkowie); rodzic każdego wiersza wskazuje na
+        najbliższego zachowanego przodka.
+        """
+        living = np.unique(np.asarray(living_ids, dtype=np.int64))
+        marked = living[self._rows(living)[1]]
+
+        # Wszyscy przodkowie żyjących
+        frontier = marked
+        while frontier.size:
+            up = self.parents(frontier)
+            frontier = np.setdiff1d(up[up != NO_PARENT], marked)
+            marked = np.union1d(marked, frontier)
+
+        # Założyciele bez zapisanych narodzin dostają wiersz bez rodzica
+        rows, found = self._rows(marked)
+        rows["child"] = marked
+        rows["tick"][~found] = UNKNOWN
+        rows["genotype"][~found] = UNKNOWN
+        parent_idx = np.searchsorted(marked, rows["parent"])
+        parent_idx[rows["parent"] == NO_PARENT] = -1
+
+        children = np.bincount(parent_idx[parent_idx >= 0], minlength=marked.size)
+        kept = np.isin(marked, living) | (children >= 2)
+
+        # Skoki wskaźnikowe do najbliższego zachowanego przodka
+        up = parent_idx
+        while True:
+            skip = (up >= 0) & ~kept[np.maximum(up, 0)]
+            if not skip.any():
+                break
+            up = np.where(skip, up[np.maximum(up, 0)], up)
+
+        rows["parent"] = np.where(up >= 0, marked[np.maximum(up, 0)], NO_PARENT)
+        self._rebuild(rows[kept])
+
+    def _rebuild(self, rows):
+        old_files = self._files
+        self._blocks, self._indexes, self._files = [], [], []
+        full = len(rows) // self.block_size * self.block_size
+        for start in range(0, full, self.block_size):
+            self._seal_block(rows[start:start + self.block_size].copy())
+        self._current = np.empty(self.block_size, dtype=BIRTH_DTYPE)
+        self._fill = len(rows) - full
+        self._current[:self._fill] = rows[full:]
+        for path in old_files:
+            os.remove(path)
@@ -0,0 +1,157 @@
+import numpy as np
+
+# Kierunki ruchu (wiersz, kolumna) - indeks to argument `dir` funkcji f_1,
+# liczony zgodnie z ruchem wskazówek zegara od "północy"
+DIRECTIONS = np.array([
+    (-1, 0), (-1, 1), (0, 1), (1, 1),
+    (1, 0), (1, -1), (0, -1), (-1, -1),
+], dtype=float)
+DIRECTIONS /= np.hypot(DIRECTIONS[:, 0], DIRECTIONS[:, 1])[:, None]
+
+# Woda głębsza niż to jest nieprzejezdna
+MAX_WADING_DEPTH = 0.5
+
+# Koszt pokonania jednej jednostki drogi na danym poziomie terenu.
+# Poziom 0 to ląd, 1-3 to coraz głębsza (ale przejezdna) woda.
+TERRAIN_COSTS = np.array([1.0, 1.5, 2.0, 3.0])
+COST_BITS = 2
+
+
+class TerrainMasks:
+    '''
+    Upakowane bitowo maski przejezdności i kosztu terenu, liczone z water_map/depth_map.
+
+    Każdy wiersz mapy zajmuje ceil(width / 8) bajtów (np.packbits), a poziom kosztu
+    trzymany jest w COST_BITS płaszczyznach bitowych.
+
+    Attributes:
+        passable : np.ndarray
+            Maska (height, ceil(width/8)) uint8 - bit 1 oznacza pole przejezdne.
+        cost_planes : np.ndarray
+            Maski (COST_BITS, height, ceil(width/8)) uint8 - kolejne bity poziomu kosztu.
+    '''
+    def __init__(self, water_map: np.ndarray, depth_map: np.ndarray):
+        self.height, self.width = water_map.shape
+        self.refresh(water_map, depth_map)
+
+    @staticmethod
+    def cost_levels(water_map, depth_map):
+        """Zwraca (przejezdność, poziom kosztu) dla podanych pól."""
+        depth = np.abs(depth_map)
+        passable = ~water_map | (depth <= MAX_WADING_DEPTH)
+        levels = np.where(
+            water_map,
+            1 + np.minimum(depth / MAX_WADING_DEPTH * (len(TERRAIN_COSTS) - 1), len(TERRAIN_COSTS) - 2),
+            0,
+        ).astype(np.uint8)
+        return passable, levels
+
+    def refresh(self, water_map, depth_map):
+        """Przelicza maski całej mapy."""
+        passable, levels = self.cost_levels(water_map, depth_map)
+        self.passable = np.packbits(passable, axis=1)
+        self.cost_planes = np.stack([
+            np.packbits((levels >> bit) & 1, axis=1) for bit in range(COST_BITS)
+        ])
+
+    def update_cell(self, i: int, j: int, water: bool, depth: float):
+        """Aktualizuje maski pojedynczego pola po zmianie w świecie."""
+        passable, level = self.cost_levels(np.array(water), np.array(depth))
+        byte, mask = j >> 3, np.uint8(0x80 >> (j & 7))
+        self._set_bit(self.passable, i, byte, mask, passable)
+        for bit in range(COST_BITS):
+            self._set_bit(self.cost_planes[bit], i, byte, mask, (level >> bit) & 1)
+
+    @staticmethod
+    def _set_bit(plane, i, byte, mask, value):
+        if value:
+            plane[i, byte] |= mask
+        else:
+            plane[i, byte] &= ~mask
+
+    def is_passable(self, rows, cols):
+        """Odczytuje bity przejezdności dla tablic indeksów (rows, cols)."""
+        return self._read_bits(self.passable, rows, cols).astype(bool)
+
+    def cost(self, rows, cols):
+        """Zwraca koszt jednostki drogi dla tablic indeksów (rows, cols)."""
+        level = np.zeros(np.shape(rows), dtype=np.uint8)
+        for bit in range(COST_BITS):
+            level |= self._read_bits(self.cost_planes[bit], rows, cols) << bit
+        return TERRAIN_COSTS[level]
+
+    @staticmethod
+    def _read_bits(plane, rows, cols):
+        cols = np.asarray(cols)
+        return (plane[rows, cols >> 3] >> (7 - (cols & 7)).astype(np.uint8)) & 1
+
+    def cast_ray(self, start, direction: int, distance: float):
+        """
+        Przechodzi promieniem (DDA) od środka pola start w kierunku direction.
+        Zwraca (najdalsze osiągalne pole, koszt drogi).
+        """
+        cells, costs = self.cast_rays([start], [direction], [distance])
+        return tuple(int(v) for v in cells[0]), float(costs[0])
+
+    def cast_rays(self, starts, directions, distances):
+        """
+        Wsadowa wersja cast_ray - rozwiązuje wszystkie ruchy naraz (np. z jednego kroku symulacji).
+
+        Promień startuje ze środka pola i przechodzi kolejne pola siatki (Amanatides-Woo).
+        Zatrzymuje się po przebyciu distance albo na granicy pola nieprzejezdnego / krawędzi
+        mapy. Ruch po przekątnej nie może ściąć rogu - oba pola boczne muszą być przejezdne.
+        Koszt to suma odcinków drogi przemnożonych przez koszt pola, przez które prowadzą.
+
+        Returns:
+            cells : np.ndarray (n, 2) int - pola końcowe
+            costs : np.ndarray (n,) float - koszt przebytej drogi
+        """
+        pos = np.array(starts, dtype=np.int64).reshape(-1, 2)
+        vec = DIRECTIONS[np.asarray(directions, dtype=np.int64) % len(DIRECTIONS)].reshape(-1, 2)
+        distances = np.maximum(np.asarray(distances, dtype=float).reshape(-1), 0.0)
+        n = len(pos)
+
+        step = np.sign(vec).astype(np.int64)
+        with np.errstate(divide='ignore'):
+            t_delta = np.where(vec != 0, 1.0 / np.abs(vec), np.inf)
+        t_max = t_delta / 2  # start ze środka pola
+        t_prev = np.zeros(n)
+        costs = np.zeros(n)
+
+        active = np.ones(n, dtype=bool)
+        while True:
+            t_next = t_max.min(axis=1)
+
+            # Koniec drogi wewnątrz bieżącego pola - doliczamy ostatni odcinek
+            done = np.flatnonzero(active & (t_next >= distances))
+            costs[done] += (distances[done] - t_prev[done]) * self.cost(pos[done, 0], pos[done, 1])
+            active[done] = False
+
+            idx = np.flatnonzero(active)
+            if not len(idx):
+                break
+
+            # Odcinek do granicy pola liczony po koszcie pola, które opuszczamy
+            costs[idx] += (t_next[idx] - t_prev[idx]) * self.cost(pos[idx, 0], pos[idx, 1])
+            t_prev[idx] = t_next[idx]
+
+            # Oś (lub obie - po przekątnej), na której promień przecina granicę pola
+            cross = t_max[idx] == t_next[idx, None]
+            target = pos[idx] + step[idx] * cross
+
+            inside = ((target >= 0) & (target < (self.height, self.width))).all(axis=1)
+            ok = inside.copy()
+            ok[inside] = self.is_passable(target[inside, 0], target[inside, 1])
+
+            diagonal = ok & cross.all(axis=1)
+            if diagonal.any():
+                rows, cols = pos[idx[diagonal], 0], pos[idx[diagonal], 1]
+                ok[diagonal] = (self.is_passable(target[diagonal, 0], cols)
+                                & self.is_passable(rows, target[diagonal, 1]))
+            active[idx[~ok]] = False
+
+            moved = idx[ok]
+            pos[moved] = target[ok]
+            t_max[moved] += np.where(cross[ok], t_delta[moved], 0.0)
+
+        return pos, costs
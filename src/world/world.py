@@ -1,5 +1,6 @@
 import numpy as np
 from tile import Tile, WaterTile, RESOURCES
+from terrain import TerrainMasks
 from perlin_noise import PerlinNoise
 
 class World:
@@ -11,6 +12,10 @@ class World:
         self.width = width
         self.seed = seed
         self.generate_map()
+        self.terrain = TerrainMasks(self.water_map, self.depth_map)
+        self.changed_tiles = set()  # Pola zmienione od ostatniego pop_changed_tiles()
+        self.tile_listeners = []  # Funkcje (i, j) wołane przy każdej zmianie pola
+        self.tick = 0
     
     def generate_map(self):
         self.generate_river_noise()
@@ -35,6 +40,54 @@ class World:
                     depth = (threshold - val) / threshold
                     self.depth_map[i, j] = depth
 
+    def set_tile(self, i: int, j: int, tile: Tile):
+        """Podmienia pole mapy i aktualizuje water_map, depth_map oraz maski terenu."""
+        self.map[i, j] = tile
+        self.water_map[i, j] = isinstance(tile, WaterTile)
+        self.depth_map[i, j] = tile.depth if isinstance(tile, WaterTile) else 0.0
+        self.terrain.update_cell(i, j, self.water_map[i, j], self.depth_map[i, j])
+        self.mark_changed(i, j)
+
+    def mark_changed(self, i: int, j: int):
+        """Zgłasza zmianę pola (np. wydobycie z tile.materials) obserwatorom i słuchaczom."""
+        self.changed_tiles.add((i, j))
+        for listener in self.tile_listeners:
+            listener(i, j)
+
+    def pop_changed_tiles(self):
+        """Zwraca zbiór pól zmienionych od ostatniego wywołania i go czyści."""
+        changed, self.changed_tiles = self.changed_tiles, set()
+        return changed
+
+    def plan_move(self, robot, direction: int, distance: float):
+        """
+        Wyznacza ruch robota bez wykonywania go.
+        Zwraca (najdalsze osiągalne pole w kierunku direction, koszt drogi).
+        """
+        return self.terrain.cast_ray(robot.position, direction, distance)
+
+    def move_robot(self, robot, direction: int, distance: float):
+        """
+        Przesuwa robota najdalej jak się da w kierunku direction (maks. distance pól).
+        Zwraca koszt przebytej drogi.
+        """
+        position, cost = self.plan_move(robot, direction, distance)
+        robot.position = position
+        return cost
+
+    def move_robots(self, moves):
+        """
+        Wsadowa wersja move_robot - wszystkie ruchy z jednego kroku w jednym wywołaniu.
+        moves to lista krotek (robot, direction, distance). Zwraca tablicę kosztów.
+        """
+        if not moves:
+            return np.zeros(0)
+        robots, directions, distances = zip(*moves)
+        cells, costs = self.terrain.cast_rays([r.position for r in robots], directions, distances)
+        for robot, cell in zip(robots, cells):
+            robot.position = (int(cell[0]), int(cell[1]))
+        return costs
+
     # Roboczo - 1 jak jest surowiec 0 jak go nie ma     TO BE DELETED LATER
     def get_simplified_map(self):
         simplified_map = np.zeros(self.map.shape)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Moduły importują się płasko (np. `from tile import ...`), tak jak przy uruchamianiu z src/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "src", "world"))
@@ -0,0 +1,154 @@
+import pytest
+from automaton import Automaton
+from config import FunctionID
+from fastforward import SteadyStateEngine
+from parts import PowerGenerator, Engine
+
+NO_PART = 9  # f_n bez odpowiadającej części - nic nie robi
+
+
+class StubInterpreter:
+    """Zamiast programu - stała lista wywołań f_n odtwarzana w kółko."""
+    def __init__(self, program):
+        self.program = program
+        self.instruction_pointer = 0
+        self.memory = [0.0] * 4
+
+    def run_step(self, robot):
+        func_id = self.program[self.instruction_pointer]
+        self.instruction_pointer = (self.instruction_pointer + 1) % len(self.program)
+        self.memory[0] = float(self.instruction_pointer)
+        return func_id, [2, 1]
+
+
+class StubWorld:
+    def __init__(self):
+        self.tick = 0
+        self.deaths = []
+        self.tile_listeners = []
+
+    def remove_automaton(self, robot):
+        self.deaths.append((robot.id, self.tick))
+
+    def plan_move(self, robot, direction, distance):
+        return (robot.position[0], robot.position[1] + 1), 1.0
+
+    def mark_changed(self, i, j):
+        for listener in self.tile_listeners:
+            listener(i, j)
+
+
+def make_robot(world, program, genome, energy, position=(5, 5), robot_id=None):
+    robot = Automaton(program, genome, world, position)
+    robot.interpreter = StubInterpreter(program)
+    robot.energy = energy
+    if robot_id is not None:
+        robot.id = robot_id
+    return robot
+
+
+def assert_same(plain, fast):
+    assert fast.alive == plain.alive
+    assert fast.energy == plain.energy
+    assert fast.position == plain.position
+    assert fast.interpreter.instruction_pointer == plain.interpreter.instruction_pointer
+    assert fast.interpreter.memory == plain.interpreter.memory
+
+
+IDLE = FunctionID.IDLE.value
+GAINING = ([IDLE, NO_PART, IDLE], [(PowerGenerator, 0.2)], 50.0)
+DRAINING = ([NO_PART, IDLE, NO_PART, NO_PART], [(PowerGenerator, 0.05), (Engine, 1.0)], 37.3)
+
+
+@pytest.mark.parametrize("program, genome, energy", [GAINING, DRAINING], ids=["gaining", "draining"])
+@pytest.mark.parametrize("ticks, sync_every", [(3000, None), (3000, 97), (5000, 1)])
+def test_fast_forward_matches_stepping(program, genome, energy, ticks, sync_every):
+    plain_world, fast_world = StubWorld(), StubWorld()
+    plain = make_robot(plain_world, program, genome, energy)
+    fast = make_robot(fast_world, program, genome, energy, robot_id=plain.id)
+    engine = SteadyStateEngine(fast_world)
+
+    slept = False
+    for tick in range(ticks):
+        plain_world.tick = tick
+        plain.update()
+        engine.step([fast])
+        slept |= engine.is_sleeping(fast)
+        if sync_every and tick % sync_every == 0:
+            engine.sync(fast)
+            assert_same(plain, fast)
+
+    engine.sync_all()
+    assert slept
+    assert_same(plain, fast)
+    assert fast_world.deaths == plain_world.deaths
+
+
+def test_draining_robot_dies_on_the_same_tick():
+    program, genome, energy = DRAINING
+    plain_world, fast_world = StubWorld(), StubWorld()
+    plain = make_robot(plain_world, program, genome, energy)
+    fast = make_robot(fast_world, program, genome, energy, robot_id=plain.id)
+    engine = SteadyStateEngine(fast_world)
+
+    for tick in range(100000):
+        plain_world.tick = tick
+        plain.update()
+        engine.step([fast])
+        if not plain.alive:
+            break
+    assert not fast.alive
+    assert fast_world.deaths == plain_world.deaths
+    assert fast.energy == plain.energy
+
+
+def test_moving_neighbour_and_tile_change_wake_sleeper():
+    world = StubWorld()
+    sleeper = make_robot(world, [IDLE], [(PowerGenerator, 0.2)], 50.0, position=(5, 7))
+    walker = make_robot(world, [NO_PART], [(Engine, 0.01), (PowerGenerator, 0.2)], 1e6, position=(5, 0))
+    engine = SteadyStateEngine(world)
+
+    for _ in range(3):
+        engine.step([sleeper])
+    assert engine.is_sleeping(sleeper)
+
+    world.mark_changed(0, 0)
+    assert engine.is_sleeping(sleeper)
+    world.mark_changed(6, 8)
+    assert not engine.is_sleeping(sleeper)
+
+    for _ in range(3):
+        engine.step([sleeper])
+    assert engine.is_sleeping(sleeper)
+
+    walker.interpreter = StubInterpreter([FunctionID.MOVE.value])
+    for _ in range(5):
+        engine.step([sleeper, walker])
+    assert walker.position == (5, 5)
+    engine.step([sleeper, walker])
+    assert not engine.is_sleeping(sleeper)
+
+
+@pytest.mark.parametrize("order", ["sleeper_first", "walker_first"])
+def test_walker_passing_sleeper_matches_stepping(order):
+    runs = []
+    for fast in (False, True):
+        world = StubWorld()
+        sleeper = make_robot(world, [IDLE], [(PowerGenerator, 0.2)], 50.0, position=(5, 5), robot_id=1)
+        walker = make_robot(world, [FunctionID.MOVE.value], [(Engine, 0.01), (PowerGenerator, 0.2)],
+                            100.0, position=(5, 1), robot_id=2)
+        robots = [sleeper, walker] if order == "sleeper_first" else [walker, sleeper]
+        engine = SteadyStateEngine(world)
+        for tick in range(12):
+            if fast:
+                engine.step(robots)
+            else:
+                world.tick = tick
+                for robot in robots:
+                    robot.update()
+        engine.sync_all()
+        runs.append((sleeper, walker))
+
+    (plain_sleeper, plain_walker), (fast_sleeper, fast_walker) = runs
+    assert_same(plain_sleeper, fast_sleeper)
+    assert_same(plain_walker, fast_walker)
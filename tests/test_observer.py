@@ -0,0 +1,201 @@
+import os
+import socket
+import threading
+import time
+import numpy as np
+import observer
+from tile import Tile, RESOURCES
+
+
+class FakeWorld:
+    def __init__(self, height=4, width=5):
+        self.height, self.width = height, width
+        self.map = np.empty((height, width), dtype=object)
+        for i in range(height):
+            for j in range(width):
+                self.map[i, j] = Tile({r: 0.0 for r in RESOURCES})
+        self.changed = set()
+
+    def pop_changed_tiles(self):
+        changed, self.changed = self.changed, set()
+        return changed
+
+
+class FakeRobot:
+    def __init__(self, rid, position, energy=10.0):
+        self.id, self.position, self.energy, self.alive = rid, position, energy, True
+
+
+def recv_frame(sock):
+    def recv(n):
+        data = b""
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            assert chunk
+            data += chunk
+        return data
+    _magic, frame_type, tick, length = observer.HEADER.unpack(recv(observer.HEADER.size))
+    return frame_type, tick, recv(length)
+
+
+def parse(payload):
+    counters = observer.COUNTERS.unpack_from(payload)
+    offset, sections = observer.COUNTERS.size, []
+    for entry in (observer.TILE, observer.ROBOT, observer.ROBOT, observer.DEAD):
+        (count,) = observer.COUNT.unpack_from(payload, offset)
+        offset += observer.COUNT.size
+        sections.append([entry.unpack_from(payload, offset + k * entry.size) for k in range(count)])
+        offset += count * entry.size
+    return counters, sections
+
+
+def connect(path):
+    client = socket.socket(socket.AF_UNIX)
+    client.settimeout(5)
+    client.connect(path)
+    return client
+
+
+def test_pending_snapshots_are_merged(tmp_path):
+    path = str(tmp_path / "observer.sock")
+    world = FakeWorld()
+    server = observer.ObserverServer(world, path=path).start()
+    try:
+        robots = [FakeRobot(1, (0, 0)), FakeRobot(2, (1, 1))]
+        server.publish(0, robots)
+        client = connect(path)
+        counters, _sections = parse(recv_frame(client)[2])
+        assert counters[:3] == (2, 0, 0)  # automaty z pierwszego publish() to stan początkowy
+
+        # Wstrzymujemy pętlę - kolejne kroki muszą zlać się w jedną deltę
+        release = threading.Event()
+        server._loop.call_soon_threadsafe(release.wait)
+        robots.append(FakeRobot(3, (2, 2)))
+        for tick in range(1, 5):
+            world.changed.add((tick % 3, 0))
+            robots[0].position = (tick, 0)
+            if tick == 2:
+                robots[2].alive = False    # urodzony i martwy w jednym oknie
+            if tick == 3:
+                robots[1].alive = False
+            if tick == 4:
+                robots.append(FakeRobot(4, (3, 3)))
+            server.publish(tick, robots)
+        release.set()
+
+        frame_type, tick, payload = recv_frame(client)
+        counters, (tiles, moved, born, dead) = parse(payload)
+        assert (frame_type, tick) == (observer.FRAME_DELTA, 4)
+        assert sorted(t[:2] for t in tiles) == [(0, 0), (1, 0), (2, 0)]
+        assert moved == [(1, 4, 0)]
+        assert born == [(4, 3, 3)] and dead == [(2,)]
+        assert counters[:3] == (2, 2, 2)
+
+        server.publish(5, robots)
+        assert recv_frame(client)[:2] == (observer.FRAME_DELTA, 5)
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_stalled_client_gets_keyframe(tmp_path):
+    path = str(tmp_path / "observer.sock")
+    world = FakeWorld(height=100, width=100)
+    everything = {(i, j) for i in range(world.height) for j in range(world.width)}
+    server = observer.ObserverServer(world, path=path, queue_size=2).start()
+    try:
+        server.publish(0, [])
+        client = connect(path)
+        while not server._subscribers:
+            time.sleep(0.01)
+        (sub,) = server._subscribers
+
+        # Klient nic nie czyta - duże delty zapychają gniazdo i kolejkę
+        tick = 0
+        while not sub.dropped and tick < 500:
+            tick += 1
+            world.changed = set(everything)
+            server.publish(tick, [])
+            time.sleep(0.005)
+        assert sub.dropped > 0
+
+        tick += 1
+        server.publish(tick, [])
+        frames = [recv_frame(client)[:2]]
+        while frames[-1] != (observer.FRAME_KEY, tick):
+            frames.append(recv_frame(client)[:2])
+        assert frames[0] == (observer.FRAME_KEY, 0)
+        assert len(frames) < tick + 1  # część delt przepadła
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_client_requests_keyframe(tmp_path):
+    path = str(tmp_path / "observer.sock")
+    world = FakeWorld()
+    server = observer.ObserverServer(world, path=path).start()
+    try:
+        robots = [FakeRobot(1, (0, 0))]
+        server.publish(0, robots)
+        client = connect(path)
+        assert recv_frame(client)[0] == observer.FRAME_KEY
+
+        client.sendall(observer.REQUEST_KEYFRAME)
+        for tick in range(1, 50):
+            server.publish(tick, robots)
+            frame_type, _tick, payload = recv_frame(client)
+            if frame_type == observer.FRAME_KEY:
+                break
+        _counters, (tiles, _moved, born, _dead) = parse(payload)
+        assert frame_type == observer.FRAME_KEY
+        assert len(tiles) == world.height * world.width
+        assert born == [(1, 0, 0)]
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_stop_with_connected_client(tmp_path, caplog):
+    path = str(tmp_path / "observer.sock")
+    server = observer.ObserverServer(FakeWorld(), path=path).start()
+    server.publish(0, [FakeRobot(1, (0, 0))])
+    client = connect(path)
+    recv_frame(client)
+    server.stop()
+
+    assert client.recv(1) == b""
+    client.close()
+    assert not [r for r in caplog.records if r.name == "asyncio"]
+    assert not os.path.exists(path)
+
+
+def test_stream_over_unix_socket(tmp_path):
+    path = str(tmp_path / "observer.sock")
+    world = FakeWorld()
+    server = observer.ObserverServer(world, path=path).start()
+    try:
+        robots = [FakeRobot(1, (0, 0)), FakeRobot(2, (1, 1))]
+        server.publish(0, robots)
+        client = socket.socket(socket.AF_UNIX)
+        client.settimeout(5)
+        client.connect(path)
+
+        frame_type, tick, payload = recv_frame(client)
+        counters, (tiles, moved, born, dead) = parse(payload)
+        assert (frame_type, tick) == (observer.FRAME_KEY, 0)
+        assert len(tiles) == world.height * world.width
+        assert sorted(r[0] for r in born) == [1, 2]
+
+        robots[0].position = (2, 3)
+        robots[1].alive = False
+        server.publish(1, robots)
+        frame_type, tick, payload = recv_frame(client)
+        counters, (tiles, moved, born, dead) = parse(payload)
+        assert (frame_type, tick) == (observer.FRAME_DELTA, 1)
+        assert moved == [(1, 2, 3)] and dead == [(2,)]
+        assert counters[0] == 1
+        client.close()
+    finally:
+        server.stop()
+    assert not os.path.exists(path)
@@ -0,0 +1,152 @@
+import random
+import numpy as np
+import pytest
+from automaton import Automaton
+from config import FunctionID
+from parts import PowerGenerator, Storage
+from phylogeny import PhylogenyRecorder, NO_PARENT, UNKNOWN
+
+
+def random_tree(recorder, births=600, founders=(0,), seed=0):
+    """Zapisuje losowe drzewo narodzin; założyciele nie mają swoich wierszy."""
+    rng = random.Random(seed)
+    parent_of = {f: NO_PARENT for f in founders}
+    ids = list(founders)
+    for child in range(max(founders) + 1, max(founders) + 1 + births):
+        parent = rng.choice(ids[-100:])
+        recorder.record(child, parent, child, 0)
+        parent_of[child] = parent
+        ids.append(child)
+    return parent_of
+
+
+def chain(parent_of, node):
+    out = []
+    while parent_of[node] != NO_PARENT:
+        node = parent_of[node]
+        out.append(node)
+    return out
+
+
+@pytest.fixture(params=[False, True], ids=["memory", "spilled"])
+def recorder(request, tmp_path):
+    return PhylogenyRecorder(block_size=64, spill_dir=str(tmp_path) if request.param else None)
+
+
+def test_queries_match_brute_force(recorder):
+    parent_of = random_tree(recorder, founders=(0, 1))
+    rng = random.Random(1)
+    for node in rng.sample(sorted(parent_of), 25):
+        assert list(recorder.ancestors(node)) == chain(parent_of, node)
+        clade = sum(1 for other in parent_of if other == node or node in chain(parent_of, other))
+        assert recorder.clade_size(node) == clade
+
+    for _ in range(10):
+        living = rng.sample(sorted(parent_of)[-150:], 5)
+        common = set.intersection(*({n, *chain(parent_of, n)} for n in living))
+        assert recorder.mrca(living) == (max(common) if common else None)
+
+
+def test_records_must_grow():
+    recorder = PhylogenyRecorder(block_size=4)
+    recorder.record(5, NO_PARENT, 0, 0)
+    with pytest.raises(ValueError):
+        recorder.record(5, NO_PARENT, 1, 0)
+
+
+def test_prune_keeps_living_and_branch_points(recorder, tmp_path):
+    parent_of = random_tree(recorder, founders=(0,), seed=3)
+    living = random.Random(4).sample(sorted(parent_of)[-200:], 8)
+    expected_mrca = recorder.mrca(living)
+
+    recorder.prune(living)
+
+    marked = set()
+    for node in living:
+        marked |= {node, *chain(parent_of, node)}
+    children = {}
+    for node in marked:
+        if parent_of[node] != NO_PARENT:
+            children[parent_of[node]] = children.get(parent_of[node], 0) + 1
+    kept = sorted(n for n in marked if n in living or children.get(n, 0) >= 2)
+
+    rows = np.concatenate(recorder._views())
+    assert list(rows["child"]) == kept
+    for row in rows:
+        nearest = [n for n in chain(parent_of, int(row["child"])) if n in kept]
+        assert row["parent"] == (nearest[0] if nearest else NO_PARENT)
+    assert recorder.mrca(living) == expected_mrca
+    if recorder.spill_dir:
+        assert len(list(tmp_path.iterdir())) == 2 * (len(kept) // recorder.block_size)
+
+
+def test_prune_with_unrecorded_founders():
+    recorder = PhylogenyRecorder(block_size=4)
+    for founder in (100, 200):
+        recorder.record(founder + 5, founder, 1, 0)
+        recorder.record(founder + 6, founder, 1, 0)
+    living = [105, 106, 205, 206]
+
+    recorder.prune(living)
+
+    rows = np.concatenate(recorder._views())
+    assert list(rows["child"]) == [100, 105, 106, 200, 205, 206]
+    assert list(rows["parent"]) == [NO_PARENT, 100, 100, NO_PARENT, 200, 200]
+    found_rows, found = recorder._rows([0, 100])
+    assert list(found) == [False, True]
+    assert found_rows[1]["tick"] == UNKNOWN and found_rows[1]["genotype"] == UNKNOWN
+    assert list(recorder.ancestors(106)) == [100]
+    assert recorder.mrca([105, 106]) == 100
+    assert recorder.mrca(living) is None
+    assert recorder.clade_size(200) == 3
+
+
+class Node:
+    def __init__(self, type, **fields):
+        self.type = type
+        self.__dict__.update(fields)
+
+
+def make_program(value):
+    return [Node("ASSIGNMENT", target=1, value=value), Node("FUNCTION_CALL", func_id=0, args=[])]
+
+
+def test_genotype_id_uses_program_content():
+    recorder = PhylogenyRecorder(block_size=4)
+    genome = [(PowerGenerator, 1.0)]
+    first = recorder.genotype_id(genome, make_program(0.5))
+    assert recorder.genotype_id(genome, make_program(0.5)) == first
+    assert recorder.genotype_id(genome, make_program(0.25)) != first
+    assert recorder.genotype_id([(PowerGenerator, 2.0)], make_program(0.5)) != first
+
+
+class IdleInterpreter:
+    def __init__(self, program):
+        self.program = program
+
+    def run_step(self, robot):
+        return FunctionID.IDLE.value, []
+
+
+class PhylogenyWorld:
+    def __init__(self):
+        self.tick = 7
+        self.phylogeny = PhylogenyRecorder(block_size=4)
+        self.automata = []
+
+    def add_automaton(self, robot):
+        self.automata.append(robot)
+
+
+def test_update_records_birth():
+    world = PhylogenyWorld()
+    parent = Automaton(make_program(1.0), [(Storage, 1.0)], world, (0, 0))
+    parent.interpreter = IdleInterpreter(parent.interpreter.program)
+
+    parent.update()
+
+    (child,) = world.automata
+    rows, found = world.phylogeny._rows([child.id])
+    assert found[0]
+    assert rows[0]["parent"] == parent.id and rows[0]["tick"] == 7
+    assert rows[0]["genotype"] == world.phylogeny.genotype_id(child.parts_genome, make_program(1.0))
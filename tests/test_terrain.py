@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from terrain import TerrainMasks, TERRAIN_COSTS, MAX_WADING_DEPTH
+
+EAST, NORTH_EAST, SOUTH = 2, 1, 4
+
+
+def make_masks(height=10, width=12):
+    water = np.zeros((height, width), dtype=bool)
+    depth = np.zeros((height, width))
+    return water, depth
+
+
+def test_straight_move_on_land_costs_distance():
+    masks = TerrainMasks(*make_masks())
+    assert masks.cast_ray((5, 5), EAST, 3) == ((5, 8), 3.0)
+    assert masks.cast_ray((5, 5), EAST, 0.5) == ((5, 5), 0.5)
+    assert masks.cast_ray((5, 5), EAST, 0.4) == ((5, 5), 0.4)
+
+
+def test_ray_stops_before_deep_water_and_map_edge():
+    water, depth = make_masks()
+    water[5, 8] = True
+    depth[5, 8] = -1.0
+    masks = TerrainMasks(water, depth)
+
+    assert masks.cast_ray((5, 5), EAST, 10) == ((5, 7), 2.5)
+    assert masks.cast_ray((5, 5), SOUTH, 10) == ((9, 5), 4.5)
+
+
+def test_wading_costs_more_than_land():
+    water, depth = make_masks()
+    water[5, 6] = True
+    depth[5, 6] = -MAX_WADING_DEPTH / 2
+    masks = TerrainMasks(water, depth)
+
+    cell, cost = masks.cast_ray((5, 5), EAST, 2)
+    level_cost = masks.cost(np.array([5]), np.array([6]))[0]
+    assert cell == (5, 7)
+    assert level_cost in TERRAIN_COSTS[1:]
+    assert cost == pytest.approx(1.0 + level_cost)
+
+
+def test_diagonal_does_not_cut_corners():
+    water, depth = make_masks()
+    water[4, 5] = water[5, 6] = True
+    depth[4, 5] = depth[5, 6] = -1.0
+    masks = TerrainMasks(water, depth)
+
+    cell, _cost = masks.cast_ray((5, 5), NORTH_EAST, 5)
+    assert cell == (5, 5)
+
+
+def test_update_cell_changes_passability():
+    masks = TerrainMasks(*make_masks())
+    masks.update_cell(5, 7, True, -1.0)
+    assert masks.cast_ray((5, 5), EAST, 5)[0] == (5, 6)
+    masks.update_cell(5, 7, False, 0.0)
+    assert masks.cast_ray((5, 5), EAST, 5)[0] == (5, 10)
+
+
+def test_batch_matches_single_rays():
+    rng = np.random.default_rng(0)
+    water = rng.random((30, 40)) < 0.3
+    depth = -rng.random((30, 40)) * water
+    masks = TerrainMasks(water, depth)
+
+    starts = np.argwhere(~water)[rng.integers(0, (~water).sum(), 200)]
+    directions = rng.integers(0, 8, 200)
+    distances = rng.uniform(0, 15, 200)
+    cells, costs = masks.cast_rays(starts, directions, distances)
+
+    for start, direction, distance, cell, cost in zip(starts, directions, distances, cells, costs):
+        single_cell, single_cost = masks.cast_ray(tuple(start), direction, distance)
+        assert single_cell == tuple(cell)
+        assert single_cost == pytest.approx(cost)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from automaton import Automaton
+from parts import Engine
+from tile import Tile, WaterTile, RESOURCES
+from world import World
+
+EAST, SOUTH = 2, 4
+
+
+@pytest.fixture
+def world():
+    """Mały świat, w którym wszystkie pola są lądem."""
+    world = World(8, 10, seed=1)
+    for i in range(world.height):
+        for j in range(world.width):
+            world.set_tile(i, j, Tile({r: 0.0 for r in RESOURCES}))
+    world.pop_changed_tiles()
+    return world
+
+
+def make_robot(world, position=(4, 2), energy=100.0):
+    robot = Automaton(None, [(Engine, 1.0)], world, position)
+    robot.energy = energy
+    return robot
+
+
+def test_set_tile_updates_maps_masks_and_changes(world):
+    world.set_tile(4, 5, WaterTile(-0.9))
+    assert world.water_map[4, 5] and world.depth_map[4, 5] == -0.9
+    assert not world.terrain.is_passable(np.array([4]), np.array([5]))[0]
+    assert world.pop_changed_tiles() == {(4, 5)}
+
+
+def test_engine_charges_by_path_cost(world):
+    robot = make_robot(world)
+    engine = robot.part_map[Engine(1.0).get_function_id()]
+    mass = robot.get_total_mass()
+
+    engine.execute_action(robot, [EAST, 3])
+    assert robot.position == (4, 5)
+    assert robot.energy == pytest.approx(100.0 - mass * 3 * 0.05)
+
+
+def test_engine_pays_only_until_blocked_and_more_in_water(world):
+    world.set_tile(4, 4, WaterTile(-0.9))
+    robot = make_robot(world)
+    engine = robot.part_map[Engine(1.0).get_function_id()]
+    mass = robot.get_total_mass()
+
+    engine.execute_action(robot, [EAST, 5])
+    assert robot.position == (4, 3)
+    assert robot.energy == pytest.approx(100.0 - mass * 1.5 * 0.05)
+
+    world.set_tile(5, 3, WaterTile(-0.1))
+    _cell, wading = world.plan_move(robot, SOUTH, 2)
+    assert wading > 2.0
+
+
+def test_engine_rejects_unaffordable_move(world):
+    robot = make_robot(world, energy=1.0)
+    engine = robot.part_map[Engine(1.0).get_function_id()]
+
+    engine.execute_action(robot, [EAST, 5])
+    assert robot.position == (4, 2)
+    assert robot.energy == 1.0
+
+
+def test_move_robots_matches_move_robot(world):
+    world.set_tile(2, 6, WaterTile(-0.9))
+    world.set_tile(6, 2, WaterTile(-0.2))
+    starts = [(2, 2), (6, 0), (0, 0), (7, 9)]
+    moves = [(EAST, 6), (EAST, 4), (SOUTH, 20), (3, 2)]
+
+    batch = [make_robot(world, start) for start in starts]
+    costs = world.move_robots([(r, d, dist) for r, (d, dist) in zip(batch, moves)])
+
+    for robot, start, (direction, distance), cost in zip(batch, starts, moves, costs):
+        single = make_robot(world, start)
+        assert world.move_robot(single, direction, distance) == pytest.approx(cost)
+        assert single.position == robot.position
+    assert world.move_robots([]).size == 0